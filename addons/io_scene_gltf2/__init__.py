@@ -214,6 +214,13 @@ class ExportGLTF2_Base:
         default=False
     )
 
+    export_mesh_quantization: BoolProperty(
+        name='Quantize attributes',
+        description='Store normals, tangents and texture coordinates with reduced precision '
+                    '(KHR_mesh_quantization) for smaller files',
+        default=False
+    )
+
     export_materials: EnumProperty(
         name='Materials',
         items=(('EXPORT', 'Export',
@@ -475,6 +482,13 @@ class ExportGLTF2_Base:
         else:
             export_settings['gltf_draco_mesh_compression'] = False
 
+        # Draco rewrites the attribute buffers itself; it wins when both
+        # it and quantization are requested
+        export_settings['gltf_mesh_quantization'] = (
+            self.export_mesh_quantization
+            and not export_settings['gltf_draco_mesh_compression']
+        )
+
         export_settings['gltf_materials'] = self.export_materials
         export_settings['gltf_colors'] = self.export_colors
         export_settings['gltf_cameras'] = self.export_cameras
@@ -675,6 +689,7 @@ class GLTF_PT_export_geometry(bpy.types.Panel):
         col = layout.column()
         col.active = operator.export_normals
         col.prop(operator, 'export_tangents')
+        layout.prop(operator, 'export_mesh_quantization')
         layout.prop(operator, 'export_colors')
         layout.prop(operator, 'export_materials')
         col = layout.column()
@@ -79,6 +79,9 @@ def __gather_gltf(exporter, export_settings):
         gltf2_io_draco_compression_extension.compress_scene_primitives(scenes, export_settings)
         exporter.add_draco_extension()
 
+    if export_settings['gltf_mesh_quantization']:
+        exporter.add_mesh_quantization_extension()
+
     for idx, scene in enumerate(scenes):
         exporter.add_scene(scene, idx==active_scene_idx)
     for animation in animations:
@@ -45,6 +45,7 @@ NORMALS = 'gltf_normals'
 TANGENTS = 'gltf_tangents'
 MORPH_TANGENT = 'gltf_morph_tangent'
 MORPH_NORMAL = 'gltf_morph_normal'
+MESH_QUANTIZATION = 'gltf_mesh_quantization'
 MATERIALS = 'gltf_materials'
 EXTRAS = 'gltf_extras'
 CAMERAS = 'gltf_cameras'
@@ -13,7 +13,11 @@
 # limitations under the License.
 
 import numpy as np
-from mathutils import Vector
+
+try:
+    import meshoptimizer
+except ImportError:
+    meshoptimizer = None
 
 from . import gltf2_blender_export_keys
 from ...io.com.gltf2_io_debug import print_console
@@ -50,10 +54,9 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
     skin = None
     if blender_vertex_groups and export_settings[gltf2_blender_export_keys.SKINS]:
         if modifiers is not None:
-            modifiers_dict = {m.type: m for m in modifiers}
-            if "ARMATURE" in modifiers_dict:
-                modifier = modifiers_dict["ARMATURE"]
-                armature = modifier.object
+            for modifier in modifiers:
+                if modifier.type == "ARMATURE":
+                    armature = modifier.object
 
         # Skin must be ignored if the object is parented to a bone of the armature
         # (This creates an infinite recursive error)
@@ -91,93 +94,101 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
     # Fetch vert positions and bone data (joint,weights)
     locs, morph_locs = __get_positions(blender_mesh, key_blocks, armature, blender_object, export_settings)
     if skin:
-        vert_bones, num_joint_sets = __get_bone_data(blender_mesh, skin, blender_vertex_groups)
-    extra_vgroup_weights = __get_extra_vgroups(blender_mesh, modifiers, blender_vertex_groups)
+        vert_joints, vert_weights, num_joint_sets = __get_bone_data(blender_mesh, skin, blender_vertex_groups)
+    extra_vgroup_weights = __get_extra_vgroups(blender_mesh, modifiers, blender_vertex_groups, export_settings)
 
     # In Blender there is both per-vert data, like position, and also per-loop
     # (loop=corner-of-poly) data, like normals or UVs. glTF only has per-vert
     # data, so we need to split Blender verts up into potentially-multiple glTF
     # verts.
     #
-    # First, we'll collect a "dot" for every loop: a struct that stores all the
-    # attributes at that loop, namely the vertex index (which determines all
-    # per-vert data), and all the per-loop data like UVs, etc.
+    # First, we'll gather all the per-loop data into one big float32 matrix
+    # with a row for every loop, keeping the vertex index (which determines
+    # all per-vert data) in a separate column array. Storing each attribute
+    # as a contiguous column block instead of an array-of-structs keeps the
+    # fill and gather phases single memcpy-like passes.
     #
-    # Each unique dot will become one unique glTF vert.
+    # Each unique (vertex index, attribute row) pair will become one unique
+    # glTF vert.
 
-    # List all fields the dot struct needs.
-    dot_fields = [('vertex_index', np.uint32)]
+    # Lay out the attribute columns: (name, number of floats) per attribute.
+    attr_fields = []
     if use_normals:
-        dot_fields += [('nx', np.float32), ('ny', np.float32), ('nz', np.float32)]
+        attr_fields.append(('NORMAL', 3))
     if use_tangents:
-        dot_fields += [('tx', np.float32), ('ty', np.float32), ('tz', np.float32), ('tw', np.float32)]
+        attr_fields.append(('TANGENT', 4))
     for uv_i in range(tex_coord_max):
-        dot_fields += [('uv%dx' % uv_i, np.float32), ('uv%dy' % uv_i, np.float32)]
+        attr_fields.append(('TEXCOORD_%d' % uv_i, 2))
     for col_i in range(color_max):
-        dot_fields += [
-            ('color%dr' % col_i, np.float32),
-            ('color%dg' % col_i, np.float32),
-            ('color%db' % col_i, np.float32),
-            ('color%da' % col_i, np.float32),
-        ]
+        attr_fields.append(('COLOR_%d' % col_i, 4))
     if use_morph_normals:
         for morph_i, _ in enumerate(key_blocks):
-            dot_fields += [
-                ('morph%dnx' % morph_i, np.float32),
-                ('morph%dny' % morph_i, np.float32),
-                ('morph%dnz' % morph_i, np.float32),
-            ]
+            attr_fields.append(('MORPH_NORMAL_%d' % morph_i, 3))
     if use_facemaps:
-        dot_fields += [('facemaps', np.float32)]
+        attr_fields.append(('_FACEMAPS', 1))
+
+    attr_offsets = {}  # maps attribute name to its first column in attrs
+    num_floats = 0
+    for name, size in attr_fields:
+        attr_offsets[name] = num_floats
+        num_floats += size
+
+    nloops = len(blender_mesh.loops)
+    attrs = np.empty((nloops, num_floats), dtype=np.float32)
 
-    dots = np.empty(len(blender_mesh.loops), dtype=np.dtype(dot_fields))
+    # Columns of attrs aren't contiguous, which foreach_get needs, so the
+    # helpers stage their foreach_get reads through this one scratch
+    # buffer instead of each allocating a fresh per-loop array.
+    scratch = np.empty(nloops * 4, dtype=np.float32)
 
-    vidxs = np.empty(len(blender_mesh.loops))
+    vidxs = np.empty(nloops, dtype=np.uint32)
     blender_mesh.loops.foreach_get('vertex_index', vidxs)
-    dots['vertex_index'] = vidxs
-    del vidxs
 
     if use_normals:
         kbs = key_blocks if use_morph_normals else []
-        normals, morph_normals = __get_normals(
-            blender_mesh, kbs, armature, blender_object, export_settings
+        ofs = attr_offsets['NORMAL']
+        morph_dsts = []
+        for morph_i, _ in enumerate(kbs):
+            mofs = attr_offsets['MORPH_NORMAL_%d' % morph_i]
+            morph_dsts.append(attrs[:, mofs:mofs + 3])
+        __get_normals(
+            blender_mesh, kbs, armature, blender_object, export_settings,
+            attrs[:, ofs:ofs + 3], morph_dsts, scratch,
         )
-        dots['nx'] = normals[:, 0]
-        dots['ny'] = normals[:, 1]
-        dots['nz'] = normals[:, 2]
-        del normals
-        for morph_i, ns in enumerate(morph_normals):
-            dots['morph%dnx' % morph_i] = ns[:, 0]
-            dots['morph%dny' % morph_i] = ns[:, 1]
-            dots['morph%dnz' % morph_i] = ns[:, 2]
-        del morph_normals
 
     if use_tangents:
-        tangents = __get_tangents(blender_mesh, armature, blender_object, export_settings)
-        dots['tx'] = tangents[:, 0]
-        dots['ty'] = tangents[:, 1]
-        dots['tz'] = tangents[:, 2]
-        del tangents
-        signs = __get_bitangent_signs(blender_mesh, armature, blender_object, export_settings)
-        dots['tw'] = signs
-        del signs
+        ofs = attr_offsets['TANGENT']
+        __get_tangents(blender_mesh, armature, blender_object, export_settings, attrs[:, ofs:ofs + 3], scratch)
+        __get_bitangent_signs(blender_mesh, armature, blender_object, export_settings, attrs[:, ofs + 3], scratch)
 
     for uv_i in range(tex_coord_max):
-        uvs = __get_uvs(blender_mesh, uv_i)
-        dots['uv%dx' % uv_i] = uvs[:, 0]
-        dots['uv%dy' % uv_i] = uvs[:, 1]
-        del uvs
+        ofs = attr_offsets['TEXCOORD_%d' % uv_i]
+        __get_uvs(blender_mesh, uv_i, attrs[:, ofs:ofs + 2], scratch)
 
     for col_i in range(color_max):
-        colors = __get_colors(blender_mesh, col_i)
-        dots['color%dr' % col_i] = colors[:, 0]
-        dots['color%dg' % col_i] = colors[:, 1]
-        dots['color%db' % col_i] = colors[:, 2]
-        dots['color%da' % col_i] = colors[:, 3]
-        del colors
+        ofs = attr_offsets['COLOR_%d' % col_i]
+        __get_colors(blender_mesh, col_i, attrs[:, ofs:ofs + 4], scratch)
 
     if use_facemaps:
-        dots['facemaps'] = __get_facemaps(blender_mesh)
+        attrs[:, attr_offsets['_FACEMAPS']] = __get_facemaps(blender_mesh)
+
+    del scratch
+
+    # Pack the vertex index bytes and attribute bytes for each loop into one
+    # flat key per loop, so deduplication compares whole rows at once instead
+    # of hashing field-by-field.
+    packed = np.ascontiguousarray(np.concatenate(
+        (vidxs.reshape(-1, 1).view(np.uint8), attrs.view(np.uint8)),
+        axis=1,
+    ))
+
+    # Hash every key down to a uint32 up front; deduplication then sorts
+    # 4-byte hashes instead of whole rows, and only compares full rows to
+    # break hash ties.
+    row_u32 = packed.view(np.uint32)
+    mults = np.cumprod(np.full(row_u32.shape[1], 0x9e3779b1, dtype=np.uint32), dtype=np.uint32)
+    hashes = np.bitwise_xor.reduce(row_u32 * mults, axis=1)
+    del row_u32, mults
 
     # Calculate triangles and sort them into primitives.
 
@@ -196,31 +207,53 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
 
         tri_material_idxs = np.empty(len(blender_mesh.loop_triangles), dtype=np.uint32)
         blender_mesh.loop_triangles.foreach_get('material_index', tri_material_idxs)
-        loop_material_idxs = np.repeat(tri_material_idxs, 3)  # material index for every loop
-        unique_material_idxs = np.unique(tri_material_idxs)
-        del tri_material_idxs
 
-        for material_idx in unique_material_idxs:
-            prim_indices[material_idx] = loop_indices[loop_material_idxs == material_idx]
+        if len(tri_material_idxs) != 0 and tri_material_idxs.min() == tri_material_idxs.max():
+            # One material for the whole mesh (the common case); every
+            # loop goes into the same primitive, no bucketing needed.
+            prim_indices[int(tri_material_idxs[0])] = loop_indices
+
+        else:
+            loop_material_idxs = np.repeat(tri_material_idxs, 3)  # material index for every loop
+            unique_material_idxs = np.unique(tri_material_idxs)
+
+            # Sort the loops by material once; every material's loops are then
+            # a contiguous slice, instead of a full-array mask scan per material.
+            order = np.argsort(loop_material_idxs, kind='stable')
+            sorted_loops = loop_indices[order]
+            starts = np.searchsorted(loop_material_idxs[order], unique_material_idxs, side='left')
+            ends = np.append(starts[1:], len(sorted_loops))
+            del order, loop_material_idxs
+
+            for material_idx, start, end in zip(unique_material_idxs, starts, ends):
+                prim_indices[material_idx] = sorted_loops[start:end]
+
+        del tri_material_idxs
 
     # Create all the primitives.
 
     primitives = []
 
     for material_idx, dot_indices in prim_indices.items():
-        # Extract just dots used by this primitive, deduplicate them, and
-        # calculate indices into this deduplicated list.
-        prim_dots = dots[dot_indices]
-        prim_dots, indices = np.unique(prim_dots, return_inverse=True)
-
-        if len(prim_dots) == 0:
+        if len(dot_indices) == 0:
             continue
 
-        # Now just move all the data for prim_dots into attribute arrays
+        # Deduplicate the loop keys used by this primitive, and calculate
+        # indices into this deduplicated list. Only the 4-byte hash column
+        # is gathered here; __dedupe_keys reads full key rows just to
+        # break hash ties.
+        first, indices = __dedupe_keys(packed, dot_indices, hashes[dot_indices])
+
+        loop_idxs = dot_indices[first]  # one representative loop per glTF vert
+
+        # Gather every attribute column for this primitive's verts in a
+        # single pass; the per-attribute arrays handed out below are all
+        # views into this one slab, so no further copies are made.
+        prim_attrs = attrs.take(loop_idxs, axis=0)
 
         attributes = {}
 
-        blender_idxs = prim_dots['vertex_index']
+        blender_idxs = vidxs[loop_idxs]
 
         attributes['POSITION'] = locs[blender_idxs]
 
@@ -228,68 +261,47 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
             attributes['MORPH_POSITION_%d' % morph_i] = vs[blender_idxs]
 
         if use_normals:
-            normals = np.empty((len(prim_dots), 3), dtype=np.float32)
-            normals[:, 0] = prim_dots['nx']
-            normals[:, 1] = prim_dots['ny']
-            normals[:, 2] = prim_dots['nz']
+            ofs = attr_offsets['NORMAL']
+            normals = prim_attrs[:, ofs:ofs + 3]
             attributes['NORMAL'] = normals
 
         if use_tangents:
-            tangents = np.empty((len(prim_dots), 4), dtype=np.float32)
-            tangents[:, 0] = prim_dots['tx']
-            tangents[:, 1] = prim_dots['ty']
-            tangents[:, 2] = prim_dots['tz']
-            tangents[:, 3] = prim_dots['tw']
+            ofs = attr_offsets['TANGENT']
+            tangents = prim_attrs[:, ofs:ofs + 4]
             attributes['TANGENT'] = tangents
 
         if use_morph_normals:
             for morph_i, _ in enumerate(key_blocks):
-                ns = np.empty((len(prim_dots), 3), dtype=np.float32)
-                ns[:, 0] = prim_dots['morph%dnx' % morph_i]
-                ns[:, 1] = prim_dots['morph%dny' % morph_i]
-                ns[:, 2] = prim_dots['morph%dnz' % morph_i]
+                ofs = attr_offsets['MORPH_NORMAL_%d' % morph_i]
+                ns = prim_attrs[:, ofs:ofs + 3]
                 attributes['MORPH_NORMAL_%d' % morph_i] = ns
 
                 if use_morph_tangents:
                     attributes['MORPH_TANGENT_%d' % morph_i] = __calc_morph_tangents(normals, ns, tangents)
 
         for tex_coord_i in range(tex_coord_max):
-            uvs = np.empty((len(prim_dots), 2), dtype=np.float32)
-            uvs[:, 0] = prim_dots['uv%dx' % tex_coord_i]
-            uvs[:, 1] = prim_dots['uv%dy' % tex_coord_i]
-            attributes['TEXCOORD_%d' % tex_coord_i] = uvs
+            ofs = attr_offsets['TEXCOORD_%d' % tex_coord_i]
+            attributes['TEXCOORD_%d' % tex_coord_i] = prim_attrs[:, ofs:ofs + 2]
 
         for color_i in range(color_max):
-            colors = np.empty((len(prim_dots), 4), dtype=np.float32)
-            colors[:, 0] = prim_dots['color%dr' % color_i]
-            colors[:, 1] = prim_dots['color%dg' % color_i]
-            colors[:, 2] = prim_dots['color%db' % color_i]
-            colors[:, 3] = prim_dots['color%da' % color_i]
-            attributes['COLOR_%d' % color_i] = colors
+            ofs = attr_offsets['COLOR_%d' % color_i]
+            attributes['COLOR_%d' % color_i] = prim_attrs[:, ofs:ofs + 4]
 
         if skin:
-            joints = [[] for _ in range(num_joint_sets)]
-            weights = [[] for _ in range(num_joint_sets)]
-
-            for vi in blender_idxs:
-                bones = vert_bones[vi]
-                for j in range(0, 4 * num_joint_sets):
-                    if j < len(bones):
-                        joint, weight = bones[j]
-                    else:
-                        joint, weight = 0, 0.0
-                    joints[j//4].append(joint)
-                    weights[j//4].append(weight)
-
-            for i, (js, ws) in enumerate(zip(joints, weights)):
-                attributes['JOINTS_%d' % i] = js
-                attributes['WEIGHTS_%d' % i] = ws
+            joints = vert_joints[blender_idxs]
+            weights = vert_weights[blender_idxs]
+
+            for i in range(num_joint_sets):
+                attributes['JOINTS_%d' % i] = joints[:, 4 * i:4 * i + 4]
+                attributes['WEIGHTS_%d' % i] = weights[:, 4 * i:4 * i + 4]
 
         for vgroup_name, weights in extra_vgroup_weights.items():
             attributes['_VG_' + vgroup_name] = weights[blender_idxs]
 
         if use_facemaps:
-            attributes['_FACEMAPS'] = prim_dots['facemaps']
+            attributes['_FACEMAPS'] = prim_attrs[:, attr_offsets['_FACEMAPS']]
+
+        indices = __optimize_primitive(attributes, indices)
 
         primitives.append({
             'attributes': attributes,
@@ -302,6 +314,84 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
     return primitives
 
 
+def __dedupe_keys(keys, dot_indices, hashes):
+    """Deduplicate the rows of keys selected by dot_indices, given the
+    uint32 hash of each selected row.
+
+    Returns (first, inverse): the position in dot_indices of the first
+    occurrence of each unique row, and for every selected row the
+    position of its unique row in first. Rows are grouped by sorting
+    their hashes; only ties between rows with the same hash touch the
+    full key rows, so a collision can at worst fail to merge two
+    identical rows, never merge two different ones.
+    """
+    # Fast path: flat-shaded meshes split nearly every loop into its own
+    # glTF vert anyway, making the dedup sort wasted work. Duplicates are
+    # local (repeated loops come from neighbouring triangles), so a
+    # prefix window is a fair sample; if it is almost entirely distinct,
+    # skip the sort and emit every loop as its own vert.
+    if len(hashes) >= 16384:
+        sample = hashes[:4096]
+        if len(np.unique(sample)) >= len(sample) - len(sample) // 100:
+            identity = np.arange(len(hashes), dtype=np.uint32)
+            return identity, identity
+
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes = hashes[order]
+
+    boundaries = np.empty(len(order), dtype=bool)
+    boundaries[0] = True
+    boundaries[1:] = sorted_hashes[1:] != sorted_hashes[:-1]
+
+    ties = ~boundaries[1:]
+    if ties.any():
+        prev_rows = keys[dot_indices[order[:-1][ties]]]
+        next_rows = keys[dot_indices[order[1:][ties]]]
+        boundaries[1:][ties] = (prev_rows != next_rows).any(axis=1)
+
+    group_ids = np.cumsum(boundaries) - 1
+    inverse = np.empty(len(order), dtype=np.uint32)
+    inverse[order] = group_ids
+    first = order[boundaries]
+    return first, inverse
+
+
+def __optimize_primitive(attributes, indices):
+    """Reorder a primitive's triangles and verts for better GPU vertex
+    cache and fetch behavior at load time.
+
+    The triangle reordering needs the meshoptimizer bindings and is
+    skipped when they aren't installed; the vert reordering (verts laid
+    out in the order the indices first reference them) is done in NumPy
+    and always runs. Returns the remapped indices; the attribute arrays
+    are remapped in place in the dict.
+    """
+    nverts = len(attributes['POSITION'])
+
+    if meshoptimizer is not None:
+        try:
+            indices = np.asarray(
+                meshoptimizer.optimize_vertex_cache(indices, nverts),
+                dtype=indices.dtype,
+            )
+        except Exception:
+            print_console('WARNING', 'meshoptimizer vertex cache optimization failed. Skipping.')
+
+    # Lay the verts out in the order the indices first reference them
+    first_use = np.sort(np.unique(indices, return_index=True)[1])
+    old_of_new = indices[first_use]
+    if np.array_equal(old_of_new, np.arange(nverts, dtype=indices.dtype)):
+        return indices  # already in fetch order
+
+    new_of_old = np.empty(nverts, dtype=indices.dtype)
+    new_of_old[old_of_new] = np.arange(nverts, dtype=indices.dtype)
+
+    for name, array in attributes.items():
+        attributes[name] = array[old_of_new]
+
+    return new_of_old[indices]
+
+
 def __get_positions(blender_mesh, key_blocks, armature, blender_object, export_settings):
     locs = np.empty(len(blender_mesh.vertices) * 3, dtype=np.float32)
     blender_mesh.vertices.foreach_get('co', locs)
@@ -314,93 +404,111 @@ def __get_positions(blender_mesh, key_blocks, armature, blender_object, export_s
         vs = vs.reshape(len(blender_mesh.vertices), 3)
         morph_locs.append(vs)
 
-    # Transform for skinning
+    yup = export_settings[gltf2_blender_export_keys.YUP]
+
+    # Transform for skinning; the Z-up to Y-up conversion is composed into
+    # the transform so the data is only walked once
     if armature and blender_object:
         apply_matrix = armature.matrix_world.inverted() @ blender_object.matrix_world
         loc_transform = armature.matrix_world @ apply_matrix
 
         loc_transform = blender_object.matrix_world
-        locs[:] = __apply_mat_to_all(loc_transform, locs)
+        locs = __apply_mat_to_all(loc_transform, locs, zup2yup=yup)
+        for i, vs in enumerate(morph_locs):
+            morph_locs[i] = __apply_mat_to_all(loc_transform, vs, zup2yup=yup)
+    elif yup:
+        __zup2yup(locs)
         for vs in morph_locs:
-            vs[:] = __apply_mat_to_all(loc_transform, vs)
+            __zup2yup(vs)
 
     # glTF stores deltas in morph targets
     for vs in morph_locs:
         vs -= locs
 
-    if export_settings[gltf2_blender_export_keys.YUP]:
-        __zup2yup(locs)
-        for vs in morph_locs:
-            __zup2yup(vs)
-
     return locs, morph_locs
 
 
-def __get_normals(blender_mesh, key_blocks, armature, blender_object, export_settings):
-    """Get normal for each loop."""
-    blender_mesh.calc_normals_split()
+def __get_normals(blender_mesh, key_blocks, armature, blender_object, export_settings, dst, morph_dsts, scratch):
+    """Get normal for each loop, written into dst (and morph_dsts for
+    each key block).
 
-    normals = np.empty(len(blender_mesh.loops) * 3, dtype=np.float32)
+    The caller is responsible for having called calc_normals_split first
+    (extract_primitives does); computing them is an O(loops) operation
+    inside Blender and doesn't need to be repeated here.
+    """
+    nloops = len(blender_mesh.loops)
+    normals = scratch[:nloops * 3]
     blender_mesh.loops.foreach_get('normal', normals)
-    normals = normals.reshape(len(blender_mesh.loops), 3)
+    normals = normals.reshape(nloops, 3)
 
     morph_normals = []
     for key_block in key_blocks:
-        ns = np.array(key_block.normals_split_get(), dtype=np.float32)
-        ns = ns.reshape(len(blender_mesh.loops), 3)
-        morph_normals.append(ns)
-
-    # Transform for skinning
+        # RNA exposes no foreach_get for shape key split normals, so
+        # normals_split_get always builds a Python sequence. np.fromiter
+        # with a known count fills a preallocated float32 buffer in one
+        # pass, skipping the intermediate copy np.array would make.
+        ns = np.fromiter(key_block.normals_split_get(), dtype=np.float32, count=nloops * 3)
+        morph_normals.append(ns.reshape(nloops, 3))
+
+    yup = export_settings[gltf2_blender_export_keys.YUP]
+    up_axis = 1 if yup else 2
+
+    # Transform for skinning; the Z-up to Y-up conversion is composed into
+    # the transform so the data is only walked once. Normalizing with
+    # zero_axis also replaces zero normals with the unit UP vector, so no
+    # separate fixup pass over the data is needed.
     if armature and blender_object:
         apply_matrix = (armature.matrix_world.inverted() @ blender_object.matrix_world)
         apply_matrix = apply_matrix.to_3x3().inverted().transposed()
         normal_transform = armature.matrix_world.to_3x3() @ apply_matrix
 
-        normals[:] = __apply_mat_to_all(normal_transform, normals)
-        __normalize_vecs(normals)
-        for ns in morph_normals:
-            ns[:] = __apply_mat_to_all(normal_transform, ns)
-            __normalize_vecs(ns)
-
-    for ns in [normals, *morph_normals]:
-        # Replace zero normals with the unit UP vector.
-        # Seems to happen sometimes with degenerate tris?
-        is_zero = ~ns.any(axis=1)
-        ns[is_zero, 2] = 1
+        __apply_mat_to_all(normal_transform, normals, zup2yup=yup, out=dst)
+        __normalize_vecs(dst, zero_axis=up_axis)
+        for ns, md in zip(morph_normals, morph_dsts):
+            __apply_mat_to_all(normal_transform, ns, zup2yup=yup, out=md)
+            __normalize_vecs(md, zero_axis=up_axis)
+    else:
+        if yup:
+            # Swizzle in the contiguous staging buffers, then copy out
+            __zup2yup(normals)
+            for ns in morph_normals:
+                __zup2yup(ns)
+        dst[:] = normals
+        for ns, md in zip(morph_normals, morph_dsts):
+            md[:] = ns
+        for ns in [dst, *morph_dsts]:
+            __normalize_vecs(ns, zero_axis=up_axis)
 
     # glTF stores deltas in morph targets
-    for ns in morph_normals:
-        ns -= normals
-
-    if export_settings[gltf2_blender_export_keys.YUP]:
-        __zup2yup(normals)
-        for ns in morph_normals:
-            __zup2yup(ns)
+    for md in morph_dsts:
+        md -= dst
 
-    return normals, morph_normals
 
-
-def __get_tangents(blender_mesh, armature, blender_object, export_settings):
-    """Get an array of the tangent for each loop."""
-    tangents = np.empty(len(blender_mesh.loops) * 3, dtype=np.float32)
+def __get_tangents(blender_mesh, armature, blender_object, export_settings, dst, scratch):
+    """Get the tangent for each loop, written into dst."""
+    nloops = len(blender_mesh.loops)
+    tangents = scratch[:nloops * 3]
     blender_mesh.loops.foreach_get('tangent', tangents)
-    tangents = tangents.reshape(len(blender_mesh.loops), 3)
+    tangents = tangents.reshape(nloops, 3)
 
-    # Transform for skinning
+    yup = export_settings[gltf2_blender_export_keys.YUP]
+
+    # Transform for skinning; the Z-up to Y-up conversion is composed into
+    # the transform so the data is only walked once
     if armature and blender_object:
         apply_matrix = armature.matrix_world.inverted() @ blender_object.matrix_world
         tangent_transform = apply_matrix.to_quaternion().to_matrix()
-        tangents = __apply_mat_to_all(tangent_transform, tangents)
-        __normalize_vecs(tangents)
-
-    if export_settings[gltf2_blender_export_keys.YUP]:
-        __zup2yup(tangents)
-
-    return tangents
+        __apply_mat_to_all(tangent_transform, tangents, zup2yup=yup, out=dst)
+        __normalize_vecs(dst)
+    else:
+        if yup:
+            __zup2yup(tangents)
+        dst[:] = tangents
 
 
-def __get_bitangent_signs(blender_mesh, armature, blender_object, export_settings):
-    signs = np.empty(len(blender_mesh.loops), dtype=np.float32)
+def __get_bitangent_signs(blender_mesh, armature, blender_object, export_settings, dst, scratch):
+    nloops = len(blender_mesh.loops)
+    signs = scratch[:nloops]
     blender_mesh.loops.foreach_get('bitangent_sign', signs)
 
     # Transform for skinning
@@ -415,30 +523,41 @@ def __get_bitangent_signs(blender_mesh, armature, blender_object, export_setting
 
     # No change for Zup -> Yup
 
-    return signs
+    dst[:] = signs
 
 
 def __calc_morph_tangents(normals, morph_normal_deltas, tangents):
     # TODO: check if this works
-    morph_tangent_deltas = np.empty((len(normals), 3), dtype=np.float32)
-
-    for i in range(len(normals)):
-        n = Vector(normals[i])
-        morph_n = n + Vector(morph_normal_deltas[i])  # convert back to non-delta
-        t = Vector(tangents[i, :3])
-
-        rotation = morph_n.rotation_difference(n)
-
-        t_morph = Vector(t)
-        t_morph.rotate(rotation)
-        morph_tangent_deltas[i] = t_morph - t  # back to delta
-
-    return morph_tangent_deltas
-
-
-def __get_uvs(blender_mesh, uv_i):
+    # Rotate each tangent by the rotation that carries the morphed normal
+    # onto the base normal, for all loops at once with Rodrigues' formula
+    # instead of per-vertex mathutils calls.
+    t = tangents[:, :3]
+
+    n_hat = normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), np.float32(1e-30))
+    morph_n = normals + morph_normal_deltas  # convert back to non-delta
+    mn_hat = morph_n / np.maximum(np.linalg.norm(morph_n, axis=1, keepdims=True), np.float32(1e-30))
+
+    axis = np.cross(mn_hat, n_hat)  # length is the sine of the rotation angle
+    cos = (mn_hat * n_hat).sum(axis=1, keepdims=True)
+
+    # t_rot = t*cos + axis x t + axis*(axis . t)/(1 + cos)
+    denom = 1.0 + cos
+    safe = denom > 1e-6
+    t_rot = (
+        t * cos +
+        np.cross(axis, t) +
+        axis * (axis * t).sum(axis=1, keepdims=True) / np.maximum(denom, np.float32(1e-6))
+    )
+    # Antiparallel normals leave the rotation axis ill-defined; use a
+    # half-turn there.
+    t_rot = np.where(safe, t_rot, -t)
+
+    return (t_rot - t).astype(np.float32, copy=False)  # back to deltas
+
+
+def __get_uvs(blender_mesh, uv_i, dst, scratch):
     layer = blender_mesh.uv_layers[uv_i]
-    uvs = np.empty(len(blender_mesh.loops) * 2, dtype=np.float32)
+    uvs = scratch[:len(blender_mesh.loops) * 2]
     layer.data.foreach_get('uv', uvs)
     uvs = uvs.reshape(len(blender_mesh.loops), 2)
 
@@ -447,26 +566,55 @@ def __get_uvs(blender_mesh, uv_i):
     uvs[:, 1] *= -1
     uvs[:, 1] += 1
 
-    return uvs
+    dst[:] = uvs
+
+
+def __make_srgb_to_linear_lut():
+    srgb = np.arange(256, dtype=np.float32) / 255.0
+    linear = np.where(
+        srgb < 0.04045,
+        srgb * (1.0 / 12.92),
+        np.power((srgb + 0.055) * (1.0 / 1.055), 2.4),
+    )
+    return linear.astype(np.float32)
 
 
-def __get_colors(blender_mesh, color_i):
+# Vertex colors are stored with byte precision, so each channel takes one
+# of only 256 values; a lookup table replaces the per-loop np.power call.
+_SRGB_TO_LINEAR_LUT = __make_srgb_to_linear_lut()
+
+
+def __get_colors(blender_mesh, color_i, dst, scratch):
     layer = blender_mesh.vertex_colors[color_i]
-    colors = np.empty(len(blender_mesh.loops) * 4, dtype=np.float32)
+    colors = scratch[:len(blender_mesh.loops) * 4]
     layer.data.foreach_get('color', colors)
     colors = colors.reshape(len(blender_mesh.loops), 4)
 
     # sRGB -> Linear
     rgb = colors[:, :-1]
-    not_small = rgb >= 0.04045
-    small_result = np.where(rgb < 0.0, 0.0, rgb * (1.0 / 12.92))
-    large_result = np.power((rgb + 0.055) * (1.0 / 1.055), 2.4, where=not_small)
-    rgb[:] = np.where(not_small, large_result, small_result)
+    np.clip(rgb, 0.0, 1.0, out=rgb)
+    rgb[:] = _SRGB_TO_LINEAR_LUT[np.round(rgb * 255.0).astype(np.uint8)]
+
+    dst[:] = colors
+
 
-    return colors
+def __get_bone_names(armature, export_settings):
+    """Get the names of an armature's bones, cached for the lifetime of
+    the export.
 
+    Building the set walks O(bones) RNA objects, and every mesh bound to
+    the same armature needs the same set.
+    """
+    cache = export_settings.setdefault('gltf_bone_name_cache', {})
+    key = armature.data.as_pointer()
+    names = cache.get(key)
+    if names is None:
+        names = frozenset(bone.name for bone in armature.data.bones)
+        cache[key] = names
+    return names
 
-def __get_extra_vgroups(blender_mesh, modifiers, blender_vertex_groups):
+
+def __get_extra_vgroups(blender_mesh, modifiers, blender_vertex_groups, export_settings):
     """Get vertex weights for vgroup that aren't used for skinning."""
     if not blender_vertex_groups:
         return {}
@@ -476,59 +624,93 @@ def __get_extra_vgroups(blender_mesh, modifiers, blender_vertex_groups):
     for m in (modifiers or []):
         if m.type == 'ARMATURE' and m.use_vertex_groups:
             if m.object and m.object.type == 'ARMATURE':
-                for bone in m.object.data.bones:
-                    skinning_vgroup_names.add(bone.name)
+                skinning_vgroup_names |= __get_bone_names(m.object, export_settings)
 
     if len(skinning_vgroup_names) == len(blender_vertex_groups):
         return {}
 
+    v_idxs, g_idxs, g_weights = __get_vgroup_stream(blender_mesh)
+
     vgroup_weights = {}
     for i, vgroup in enumerate(blender_vertex_groups):
         if vgroup.name in skinning_vgroup_names: continue
-        weights = []
-        for vertex in blender_mesh.vertices:
-            weight = 0.0
-            for vge in vertex.groups:
-                if vge.group == i:
-                    weight = vge.weight
-                    break
-            weights.append(weight)
-        vgroup_weights[vgroup.name] = np.array(weights, dtype=np.float32)
+        mask = g_idxs == i
+        weights = np.zeros(len(blender_mesh.vertices), dtype=np.float32)
+        weights[v_idxs[mask]] = g_weights[mask]
+        vgroup_weights[vgroup.name] = weights
     return vgroup_weights
 
 
-def __get_bone_data(blender_mesh, skin, blender_vertex_groups):
-    joint_name_to_index = {joint.name: index for index, joint in enumerate(skin.joints)}
-    group_to_joint = [joint_name_to_index.get(g.name) for g in blender_vertex_groups]
-
-    # List of (joint, weight) pairs for each vert
-    vert_bones = []
-    max_num_influences = 0
+def __get_vgroup_stream(blender_mesh):
+    """Get flat (vertex index, group index, weight) arrays with one entry
+    for every vertex-group element in the mesh."""
+    nverts = len(blender_mesh.vertices)
+    group_counts = np.fromiter(
+        (len(vertex.groups) for vertex in blender_mesh.vertices),
+        dtype=np.int32,
+        count=nverts,
+    )
 
+    g_idxs = np.empty(int(group_counts.sum()), dtype=np.int32)
+    g_weights = np.empty(len(g_idxs), dtype=np.float32)
+    i = 0
     for vertex in blender_mesh.vertices:
-        bones = []
-        if vertex.groups:
-            for group_element in vertex.groups:
-                weight = group_element.weight
-                if weight <= 0.0:
-                    continue
-                try:
-                    joint = group_to_joint[group_element.group]
-                except Exception:
-                    continue
-                if joint is None:
-                    continue
-                bones.append((joint, weight))
-        bones.sort(key=lambda x: x[1], reverse=True)
-        if not bones: bones = ((0, 1.0),)  # HACK for verts with zero weight (#308)
-        vert_bones.append(bones)
-        if len(bones) > max_num_influences:
-            max_num_influences = len(bones)
+        for group_element in vertex.groups:
+            g_idxs[i] = group_element.group
+            g_weights[i] = group_element.weight
+            i += 1
+
+    v_idxs = np.repeat(np.arange(nverts, dtype=np.uint32), group_counts)
+    return v_idxs, g_idxs, g_weights
+
+
+def __get_bone_data(blender_mesh, skin, blender_vertex_groups):
+    joint_name_to_index = {joint.name: index for index, joint in enumerate(skin.joints)}
+    group_to_joint = np.array(
+        [joint_name_to_index.get(g.name, -1) for g in blender_vertex_groups],
+        dtype=np.int32,
+    )
+
+    nverts = len(blender_mesh.vertices)
+    v_idxs, g_idxs, g_weights = __get_vgroup_stream(blender_mesh)
+
+    # Keep only entries with positive weight that map to a joint
+    joint_idxs = np.full(len(g_idxs), -1, dtype=np.int32)
+    in_range = g_idxs < len(group_to_joint)
+    joint_idxs[in_range] = group_to_joint[g_idxs[in_range]]
+    valid = (g_weights > 0.0) & (joint_idxs >= 0)
+    v_idxs = v_idxs[valid]
+    joint_idxs = joint_idxs[valid]
+    g_weights = g_weights[valid]
+
+    # Sort by vert, then by descending weight within each vert
+    order = np.lexsort((-g_weights, v_idxs))
+    v_idxs = v_idxs[order]
+    joint_idxs = joint_idxs[order]
+    g_weights = g_weights[order]
+
+    influence_counts = np.bincount(v_idxs, minlength=nverts)
+    max_num_influences = max(int(influence_counts.max(initial=0)), 1)
 
     # How many joint sets do we need? 1 set = 4 influences
     num_joint_sets = (max_num_influences + 3) // 4
 
-    return vert_bones, num_joint_sets
+    # Scatter into dense (vert, influence) arrays so the per-primitive
+    # assembly can be a single fancy-indexing gather. Each entry lands at
+    # its rank within its vert's influences.
+    vert_starts = np.cumsum(influence_counts) - influence_counts
+    influence_slots = np.arange(len(v_idxs)) - np.repeat(vert_starts, influence_counts)
+
+    vert_joints = np.zeros((nverts, 4 * num_joint_sets), dtype=np.uint32)
+    vert_weights = np.zeros((nverts, 4 * num_joint_sets), dtype=np.float32)
+    flat_idxs = v_idxs.astype(np.int64) * (4 * num_joint_sets) + influence_slots
+    vert_joints.reshape(-1)[flat_idxs] = joint_idxs
+    vert_weights.reshape(-1)[flat_idxs] = g_weights
+
+    # HACK for verts with zero weight (#308)
+    vert_weights[influence_counts == 0, 0] = 1.0
+
+    return vert_joints, vert_weights, num_joint_sets
 
 
 def __get_facemaps(blender_mesh):
@@ -536,11 +718,12 @@ def __get_facemaps(blender_mesh):
     poly_facemap = np.empty(len(blender_mesh.polygons), dtype=np.float32)
     blender_mesh.face_maps[0].data.foreach_get('value', poly_facemap)
 
-    # Get polygon_index for each loop in the mesh
-    loop_polyidx = np.zeros(len(blender_mesh.loops), dtype=np.uint32)
-    for polyi, poly in enumerate(blender_mesh.polygons):
-        for i in range(poly.loop_start, poly.loop_start + poly.loop_total):
-            loop_polyidx[i] = polyi
+    # Get polygon_index for each loop in the mesh. Polygon loops are laid
+    # out consecutively, so repeating each polygon index loop_total times
+    # produces the per-loop polygon index in one C-level call.
+    loop_totals = np.empty(len(blender_mesh.polygons), dtype=np.int32)
+    blender_mesh.polygons.foreach_get('loop_total', loop_totals)
+    loop_polyidx = np.repeat(np.arange(len(blender_mesh.polygons), dtype=np.uint32), loop_totals)
 
     return poly_facemap[loop_polyidx]
 
@@ -551,17 +734,48 @@ def __zup2yup(array):
     array[:, 2] *= -1  # x,z,-y
 
 
-def __apply_mat_to_all(matrix, vectors):
-    """Given matrix m and vectors [v1,v2,...], computes [m@v1,m@v2,...]"""
-    # Linear part
+# The x,y,z -> x,z,-y conversion as a matrix, for composing into transforms
+_ZUP2YUP3 = np.array([[1, 0, 0], [0, 0, 1], [0, -1, 0]], dtype=np.float32)
+
+
+def __apply_mat_to_all(matrix, vectors, zup2yup=False, out=None):
+    """Given matrix m and vectors [v1,v2,...], computes [m@v1,m@v2,...].
+
+    When zup2yup is set, the Z-up to Y-up axis conversion is premultiplied
+    onto m, so the result needs no separate __zup2yup pass. When out is
+    given, the result is written there instead of a fresh array.
+    """
+    # Linear part. Keeping the matrix in float32 keeps the whole matmul in
+    # float32; converting it lazily per-row to float64 would double the
+    # bytes moved and force a float64 result that needs converting back.
     m = matrix.to_3x3() if len(matrix) == 4 else matrix
-    res = np.matmul(vectors, np.array(m.transposed()))
+    mat = np.array(m.transposed(), dtype=np.float32)
+    if zup2yup:
+        mat = mat @ _ZUP2YUP3.transpose()
+    res = np.matmul(vectors, mat, out=out)
     # Translation part
     if len(matrix) == 4:
-        res += np.array(matrix.translation)
+        translation = np.array(matrix.translation, dtype=np.float32)
+        if zup2yup:
+            translation = translation @ _ZUP2YUP3.transpose()
+        res += translation
     return res
 
 
-def __normalize_vecs(vectors):
-    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-    np.divide(vectors, norms, out=vectors, where=norms != 0)
+def __normalize_vecs(vectors, zero_axis=None):
+    # einsum computes the squared norms without materializing the squared
+    # matrix, and multiplying by the reciprocal in place avoids both the
+    # division pass and the where= mask (zero vectors stay zero, since
+    # 0 * huge == 0).
+    norms = np.einsum('ij,ij->i', vectors, vectors)
+    if zero_axis is not None:
+        # Zero-length vectors (degenerate tris?) become the unit vector
+        # along zero_axis, decided off the squared norm already in hand
+        # rather than a separate ~any(axis=1) pass over the data.
+        is_zero = norms == 0.0
+        vectors[is_zero, zero_axis] = 1.0
+        norms[is_zero] = 1.0
+    np.sqrt(norms, out=norms)
+    np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+    np.reciprocal(norms, out=norms)
+    vectors *= norms[:, np.newaxis]
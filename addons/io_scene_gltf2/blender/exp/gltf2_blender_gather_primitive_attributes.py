@@ -86,12 +86,52 @@ def __gather_position(blender_primitive, export_settings):
     }
 
 
+def __unit_vec_to_quantized_accessor(array, data_type):
+    """Make a normalized int16 accessor for unit-range float data.
+
+    Needs the KHR_mesh_quantization extension to be declared in the file.
+    """
+    quantized = np.clip(np.round(array * 32767.0), -32767, 32767).astype(np.int16)
+
+    # Vertex attribute data must stay 4-byte aligned, so elements with an
+    # odd component count get a padding column and an explicit stride.
+    byte_stride = None
+    num_elems = quantized.shape[1]
+    if (num_elems * 2) % 4 != 0:
+        padded = np.zeros((len(quantized), num_elems + 1), dtype=np.int16)
+        padded[:, :num_elems] = quantized
+        quantized = padded
+        byte_stride = quantized.shape[1] * 2
+
+    return gltf2_io.Accessor(
+        buffer_view=gltf2_io_binary_data.BinaryData(quantized.tobytes(), byte_stride=byte_stride),
+        byte_offset=None,
+        component_type=gltf2_io_constants.ComponentType.Short,
+        count=len(array),
+        extensions=None,
+        extras=None,
+        max=None,
+        min=None,
+        name=None,
+        normalized=True,
+        sparse=None,
+        type=data_type,
+    )
+
+
 def __gather_normal(blender_primitive, export_settings):
     if not export_settings[gltf2_blender_export_keys.NORMALS]:
         return {}
     if 'NORMAL' not in blender_primitive["attributes"]:
         return {}
     normal = blender_primitive["attributes"]['NORMAL']
+    if export_settings[gltf2_blender_export_keys.MESH_QUANTIZATION]:
+        return {
+            "NORMAL": __unit_vec_to_quantized_accessor(
+                normal,
+                data_type=gltf2_io_constants.DataType.Vec3,
+            )
+        }
     return {
         "NORMAL": array_to_accessor(
             normal,
@@ -107,6 +147,13 @@ def __gather_tangent(blender_primitive, export_settings):
     if 'TANGENT' not in blender_primitive["attributes"]:
         return {}
     tangent = blender_primitive["attributes"]['TANGENT']
+    if export_settings[gltf2_blender_export_keys.MESH_QUANTIZATION]:
+        return {
+            "TANGENT": __unit_vec_to_quantized_accessor(
+                tangent,
+                data_type=gltf2_io_constants.DataType.Vec4,
+            )
+        }
     return {
         "TANGENT": array_to_accessor(
             tangent,
@@ -123,11 +170,31 @@ def __gather_texcoord(blender_primitive, export_settings):
         tex_coord_id = 'TEXCOORD_' + str(tex_coord_index)
         while blender_primitive["attributes"].get(tex_coord_id) is not None:
             tex_coord = blender_primitive["attributes"][tex_coord_id]
-            attributes[tex_coord_id] = array_to_accessor(
-                tex_coord,
-                component_type=gltf2_io_constants.ComponentType.Float,
-                data_type=gltf2_io_constants.DataType.Vec2,
-            )
+            if export_settings[gltf2_blender_export_keys.MESH_QUANTIZATION] \
+                    and tex_coord.min() >= 0.0 and tex_coord.max() <= 1.0:
+                # UVs inside the unit square become normalized ushorts;
+                # UVs outside it keep full float precision
+                quantized = (tex_coord * 65535.0 + 0.5).astype(np.uint16)
+                attributes[tex_coord_id] = gltf2_io.Accessor(
+                    buffer_view=gltf2_io_binary_data.BinaryData(quantized.tobytes()),
+                    byte_offset=None,
+                    component_type=gltf2_io_constants.ComponentType.UnsignedShort,
+                    count=len(quantized),
+                    extensions=None,
+                    extras=None,
+                    max=None,
+                    min=None,
+                    name=None,
+                    normalized=True,
+                    sparse=None,
+                    type=gltf2_io_constants.DataType.Vec2,
+                )
+            else:
+                attributes[tex_coord_id] = array_to_accessor(
+                    tex_coord,
+                    component_type=gltf2_io_constants.ComponentType.Float,
+                    data_type=gltf2_io_constants.DataType.Vec2,
+                )
             tex_coord_index += 1
             tex_coord_id = 'TEXCOORD_' + str(tex_coord_index)
     return attributes
@@ -176,7 +243,8 @@ def __gather_skins(blender_primitive, export_settings):
         bone_set_index = 0
         joint_id = 'JOINTS_' + str(bone_set_index)
         weight_id = 'WEIGHTS_' + str(bone_set_index)
-        while blender_primitive["attributes"].get(joint_id) and blender_primitive["attributes"].get(weight_id):
+        while blender_primitive["attributes"].get(joint_id) is not None and \
+                blender_primitive["attributes"].get(weight_id) is not None:
             if bone_set_index >= 1:
                 if not export_settings['gltf_all_vertex_influences']:
                     gltf2_io_debug.print_console("WARNING", "There are more than 4 joint vertex influences."
@@ -186,10 +254,10 @@ def __gather_skins(blender_primitive, export_settings):
             # joints
             internal_joint = blender_primitive["attributes"][joint_id]
             component_type = gltf2_io_constants.ComponentType.UnsignedShort
-            if max(internal_joint) < 256:
+            if internal_joint.max() < 256:
                 component_type = gltf2_io_constants.ComponentType.UnsignedByte
             joint = array_to_accessor(
-                internal_joint,
+                internal_joint.astype(gltf2_io_constants.ComponentType.to_numpy_dtype(component_type)),
                 component_type,
                 data_type=gltf2_io_constants.DataType.Vec4,
             )
@@ -199,12 +267,8 @@ def __gather_skins(blender_primitive, export_settings):
             internal_weight = blender_primitive["attributes"][weight_id]
             # normalize first 4 weights, when not exporting all influences
             if not export_settings['gltf_all_vertex_influences']:
-                for idx in range(0, len(internal_weight), 4):
-                    weight_slice = internal_weight[idx:idx + 4]
-                    total = sum(weight_slice)
-                    if total > 0:
-                        factor = 1.0 / total
-                        internal_weight[idx:idx + 4] = [w * factor for w in weight_slice]
+                totals = internal_weight.sum(axis=1, keepdims=True)
+                np.divide(internal_weight, totals, out=internal_weight, where=totals > 0)
 
             weight = array_to_accessor(
                 internal_weight,
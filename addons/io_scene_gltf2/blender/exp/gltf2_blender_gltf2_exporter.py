@@ -153,6 +153,15 @@ class GlTF2Exporter:
         self.__gltf.extensions_required.append('KHR_draco_mesh_compression')
         self.__gltf.extensions_used.append('KHR_draco_mesh_compression')
 
+    def add_mesh_quantization_extension(self):
+        """
+        Register mesh quantization extension as *used* and *required*.
+
+        :return:
+        """
+        self.__gltf.extensions_required.append('KHR_mesh_quantization')
+        self.__gltf.extensions_used.append('KHR_mesh_quantization')
+
     def finalize_images(self):
         """
         Write all images.
@@ -20,16 +20,17 @@ from io_scene_gltf2.io.com import gltf2_io_constants
 class BinaryData:
     """Store for gltf binary data that can later be stored in a buffer."""
 
-    def __init__(self, data: bytes):
+    def __init__(self, data: bytes, byte_stride: typing.Optional[int] = None):
         if not isinstance(data, bytes):
             raise TypeError("Data is not a bytes array")
         self.data = data
+        self.byte_stride = byte_stride
 
     def __eq__(self, other):
-        return self.data == other.data
+        return self.data == other.data and self.byte_stride == other.byte_stride
 
     def __hash__(self):
-        return hash(self.data)
+        return hash((self.data, self.byte_stride))
 
     @classmethod
     def from_list(cls, lst: typing.List[typing.Any], gltf_component_type: gltf2_io_constants.ComponentType):